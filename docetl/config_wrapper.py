@@ -1,6 +1,8 @@
 import datetime
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional
 
 import pyrate_limiter
@@ -70,9 +72,25 @@ class ConfigWrapper(object):
         bucket_factory = create_bucket_factory(self.config.get("rate_limits", {}))
         self.rate_limiter = pyrate_limiter.Limiter(bucket_factory, max_delay=200)
         self.is_cancelled = False
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        self._io_executor_lock = threading.Lock()
 
         self.api = APIWrapper(self)
 
+    @property
+    def io_executor(self) -> ThreadPoolExecutor:
+        """
+        Thread pool shared by all operations for blocking I/O such as LLM calls,
+        created on first use. Operations bound their own concurrency on top of it.
+        """
+        if self._io_executor is None:
+            with self._io_executor_lock:
+                if self._io_executor is None:
+                    self._io_executor = ThreadPoolExecutor(
+                        max_workers=self.max_threads, thread_name_prefix="docetl-io"
+                    )
+        return self._io_executor
+
     def reset_env(self):
         os.environ = self._original_env
 
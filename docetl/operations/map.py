@@ -4,19 +4,254 @@ The `MapOperation` and `ParallelMapOperation` classes are subclasses of `BaseOpe
 
 import asyncio
 import base64
+import copy
+import functools
+import hashlib
+import mimetypes
+import mmap
+import os
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, List, Optional, Tuple, Union
+from itertools import chain, zip_longest
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import requests
 from jinja2 import Template
 from litellm.utils import ModelResponse
 from pydantic import Field, field_validator
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
 
 from docetl.base_schemas import Tool, ToolFunction
 from docetl.operations.base import BaseOperation
-from docetl.operations.utils import RichLoopBar, strict_render
+from docetl.operations.utils import LLMResult, RichLoopBar, SemanticCache, strict_render
 from docetl.operations.utils.api import OutputMode
+from docetl.operations.utils.validation import (
+    compile_strict_template,
+    compile_variables_template,
+)
+from docetl.utils import completion_cost
+
+T = TypeVar("T")
+
+# Shared session so PDF downloads reuse pooled connections instead of paying
+# for a new TCP/TLS handshake per document
+_HTTP_SESSION = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=64,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3),
+)
+_HTTP_SESSION.mount("https://", _HTTP_ADAPTER)
+_HTTP_SESSION.mount("http://", _HTTP_ADAPTER)
+
+# Read size for PDFs; a multiple of 3 so chunks base64-encode without padding
+_PDF_CHUNK_SIZE = 3 * 64 * 1024
+
+# Leading bytes of the document types that can be sent alongside a prompt
+_MAGIC_MIME_TYPES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def _data_uri_prefix(head: bytes, name: str) -> bytes:
+    """
+    Return the data URI prefix for a document, given its first bytes and its
+    path or URL. The type is sniffed from the content, falling back to the
+    file extension, and then to PDF.
+    """
+    mime_type = next(
+        (mime for magic, mime in _MAGIC_MIME_TYPES if head.startswith(magic)), None
+    )
+    if mime_type is None and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        mime_type = "image/webp"
+    if mime_type is None:
+        mime_type = mimetypes.guess_type(name)[0] or "application/pdf"
+    return f"data:{mime_type};base64,".encode("ascii")
+
+
+def _remote_pdf_to_data_uri(pdf_url: str) -> str:
+    """
+    Download the PDF at a URL into a data URI, encoding the body as it streams
+    in rather than after the whole file has arrived.
+    """
+    with _HTTP_SESSION.get(pdf_url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        size_hint = response.headers.get("Content-Length")
+        return _pdf_to_data_uri(
+            response.iter_content(chunk_size=_PDF_CHUNK_SIZE),
+            int(size_hint) if size_hint and size_hint.isdigit() else None,
+            name=pdf_url,
+        )
+
+
+def _pdf_to_data_uri(
+    chunks: Iterable[bytes], size_hint: Optional[int] = None, name: str = ""
+) -> str:
+    """
+    Base64-encode a PDF into a data URI chunk by chunk, so the raw file and a
+    full intermediate encoding never need to be held in memory at once. If the
+    size is known up front, the output buffer is allocated once at full size;
+    a wrong hint only costs a resize.
+    """
+    # Buffer enough of the start of the document to sniff its type
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= 16:
+            break
+    prefix = _data_uri_prefix(head, name)
+    prefix_len = len(prefix)
+    out = bytearray(prefix_len + ((size_hint or 0) + 2) // 3 * 4)
+    out[:prefix_len] = prefix
+    pos = prefix_len
+    remainder = b""
+    for chunk in chain((head,), chunks):
+        if remainder:
+            chunk = remainder + chunk
+        # Only encode whole 3-byte groups; carry the rest into the next chunk
+        cut = len(chunk) - len(chunk) % 3
+        encoded = base64.b64encode(memoryview(chunk)[:cut])
+        out[pos : pos + len(encoded)] = encoded
+        pos += len(encoded)
+        remainder = chunk[cut:]
+    encoded = base64.b64encode(remainder)
+    out[pos : pos + len(encoded)] = encoded
+    del out[pos + len(encoded) :]
+    return out.decode("ascii")
+
+
+def _load_pdf_data_uri(pdf_url: str, version: Optional[Tuple[int, int]]) -> str:
+    """
+    Load a PDF as a data URI. ``version`` is unused here but is part of the
+    cache key when wrapped in an LRU cache, so a changed local file is reloaded.
+    """
+    if pdf_url.startswith("http"):
+        return _remote_pdf_to_data_uri(pdf_url)
+    return _local_pdf_to_data_uri(pdf_url)
+
+
+def _local_pdf_to_data_uri(path: str) -> str:
+    """
+    Base64-encode a local PDF into a data URI. The file is memory-mapped and
+    encoded straight from the page cache into a buffer of the exact output
+    size, so its bytes are never copied into Python objects first.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return _data_uri_prefix(b"", path).decode("ascii")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                prefix = _data_uri_prefix(bytes(view[:16]), path)
+                prefix_len = len(prefix)
+                out = bytearray(prefix_len + (size + 2) // 3 * 4)
+                out[:prefix_len] = prefix
+                pos = prefix_len
+                for start in range(0, size, _PDF_CHUNK_SIZE):
+                    encoded = base64.b64encode(view[start : start + _PDF_CHUNK_SIZE])
+                    out[pos : pos + len(encoded)] = encoded
+                    pos += len(encoded)
+    return out.decode("ascii")
+
+
+def _pdf_version(pdf_url: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime, size) for a local PDF, or None for a URL."""
+    if pdf_url.startswith("http"):
+        return None
+    stat = os.stat(pdf_url)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _PdfLoader:
+    """
+    Loads PDFs as data URIs, keeping the few most recently used ones in memory
+    so documents shared across items (or prompts) are only downloaded and
+    encoded once. Local files are keyed on (path, mtime, size), so edits are
+    picked up.
+    """
+
+    def __init__(self, cache_size: int):
+        self._load = functools.lru_cache(maxsize=cache_size)(_load_pdf_data_uri)
+        # Per-URL locks with a count of the threads using each, so a lock only
+        # lives while a load of its URL is in flight
+        self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._locks_lock = threading.Lock()
+
+    def __call__(self, pdf_url: str) -> str:
+        # Concurrent requests for one document wait for a single load
+        version = _pdf_version(pdf_url)
+        with self._locks_lock:
+            lock, users = self._locks.get(pdf_url, (threading.Lock(), 0))
+            self._locks[pdf_url] = (lock, users + 1)
+        try:
+            with lock:
+                return self._load(pdf_url, version)
+        finally:
+            with self._locks_lock:
+                lock, users = self._locks[pdf_url]
+                if users == 1:
+                    del self._locks[pdf_url]
+                else:
+                    self._locks[pdf_url] = (lock, users - 1)
+
+
+class _PromptSpec(NamedTuple):
+    """A parallel_map prompt configuration, resolved once per execute call."""
+
+    prompt: str
+    model: str
+    tools: Optional[List[Dict[str, Any]]]
+    gleaning: Optional[Dict[str, Any]]
+    # Schema of just this prompt's output keys. Shared by every call made with
+    # this prompt, so it must not be modified; it stays a plain dict because
+    # call_llm JSON-serializes it into the cache key.
+    output_schema: Dict[str, Any]
+
+
+def _drop_key_set(drop_keys: Optional[Union[str, List[str]]]) -> frozenset:
+    """Normalize a drop_keys config value into a set for O(1) membership checks."""
+    if isinstance(drop_keys, str):
+        return frozenset((drop_keys,))
+    return frozenset(drop_keys or ())
+
+
+def _drop_keys(item: Dict, drop_keys: frozenset) -> Dict:
+    """Return a copy of item without the keys in drop_keys."""
+    return {k: v for k, v in item.items() if k not in drop_keys}
+
+
+def _run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs a coroutine to completion from synchronous code.
+
+    If the calling thread already has a running event loop (e.g., in a Jupyter
+    notebook), the coroutine is run on a fresh loop in a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
 
 class MapOperation(BaseOperation):
@@ -42,10 +277,15 @@ class MapOperation(BaseOperation):
         batch_prompt: Optional[str] = None
         litellm_completion_kwargs: Dict[str, Any] = {}
         pdf_url_key: Optional[str] = None
+        pdf_cache_size: int = 4
         flush_partial_result: bool = False
         # Calibration parameters
         calibrate: bool = False
         num_calibration_docs: int = 10
+        # Semantic cache parameters
+        semantic_cache: bool = False
+        semantic_cache_threshold: float = 0.95
+        semantic_cache_embedding_model: Optional[str] = None
 
         @field_validator("drop_keys")
         def validate_drop_keys(cls, v):
@@ -63,6 +303,18 @@ class MapOperation(BaseOperation):
             "max_batch_size", kwargs.get("max_batch_size", None)
         )
         self.clustering_method = "random"
+        self._semantic_cache = (
+            SemanticCache(self.config.get("semantic_cache_threshold", 0.95))
+            if self.config.get("semantic_cache", False)
+            else None
+        )
+        self._calibration_context: Optional[str] = None
+        self._load_pdf = _PdfLoader(self.config.get("pdf_cache_size", 4))
+        # Per-item results from the calibration pass, keyed by id(item), so the
+        # sampled documents aren't sent to the LLM again when the prompt is
+        # unchanged by calibration
+        self._calibration_cache: Dict[int, Tuple[Optional[List[Dict]], float]] = {}
+        self._recording_calibration = False
 
     def _generate_calibration_context(self, input_data: List[Dict]) -> str:
         """
@@ -96,7 +348,12 @@ class MapOperation(BaseOperation):
 
         try:
             # Run the map operation on the calibration sample
-            calibration_results, _ = self.execute(calibration_sample)
+            self._calibration_cache.clear()
+            self._recording_calibration = True
+            try:
+                calibration_results, _ = self.execute(calibration_sample)
+            finally:
+                self._recording_calibration = False
 
             # Prepare the calibration analysis prompt
             calibration_prompt = f"""
@@ -190,6 +447,12 @@ Reference anchors:"""
         if config.num_calibration_docs and config.num_calibration_docs <= 0:
             raise ValueError("'num_calibration_docs' must be a positive integer")
 
+        if config.pdf_cache_size < 0:
+            raise ValueError("'pdf_cache_size' must be a non-negative integer")
+
+        if config.semantic_cache and not 0 < config.semantic_cache_threshold <= 1:
+            raise ValueError("'semantic_cache_threshold' must be in the range (0, 1]")
+
         if config.batch_prompt:
             try:
                 template = Template(config.batch_prompt)
@@ -212,7 +475,7 @@ Reference anchors:"""
 
             if config.prompt:
                 try:
-                    Template(config.prompt)
+                    compile_strict_template(config.prompt)
                 except Exception as e:
                     raise ValueError(
                         f"Invalid Jinja2 template in 'prompt': {str(e)}"
@@ -264,30 +527,30 @@ Reference anchors:"""
 
         The method uses parallel processing to improve performance.
         """
+        drop_keys = _drop_key_set(self.config.get("drop_keys"))
+
         # Check if there's no prompt and only drop_keys
         if "prompt" not in self.config and "drop_keys" in self.config:
             # If only drop_keys is specified, simply drop the keys and return
-            dropped_results = []
-            for item in input_data:
-                new_item = {
-                    k: v for k, v in item.items() if k not in self.config["drop_keys"]
-                }
-                dropped_results.append(new_item)
-            return dropped_results, 0.0  # Return the modified data with no cost
+            # Return the modified data with no cost
+            return [_drop_keys(item, drop_keys) for item in input_data], 0.0
 
-        # Generate calibration context if enabled
-        calibration_context = ""
+        # Generate calibration context if enabled. The context is sent as its
+        # own system message rather than appended to the prompt, so the shared
+        # prefix of every request stays identical and provider-side prompt
+        # caching still applies.
         if self.config.get("calibrate", False) and "prompt" in self.config:
+            self._calibration_context = None
             calibration_context = self._generate_calibration_context(input_data)
             if calibration_context:
-                # Store original prompt for potential restoration
-                self._original_prompt = self.config["prompt"]
-                # Augment the prompt with calibration context
-                self.config["prompt"] = (
-                    f"{self.config['prompt']}\n\n{calibration_context}"
-                )
+                self._calibration_context = calibration_context
+                # The sample's outputs were produced without the new context
+                self._calibration_cache.clear()
+                # Outputs cached before calibration don't reflect the new context
+                if self._semantic_cache is not None:
+                    self._semantic_cache = SemanticCache(self._semantic_cache.threshold)
                 self.console.log(
-                    f"[bold green]New map ({self.config['name']}) prompt augmented with context on how to improve consistency:[/bold green] {self.config['prompt']}"
+                    f"[bold green]New map ({self.config['name']}) calibrated with context on how to improve consistency:[/bold green] {calibration_context}"
                 )
             else:
                 self.console.log(
@@ -297,59 +560,143 @@ Reference anchors:"""
         if self.status:
             self.status.stop()
 
+        # Config lookups shared by every item, resolved once per execute call
+        schema = self.config["output"]["schema"]
+        schema_keys = frozenset(schema)
+        structured_mode = (
+            self.config.get("output", {}).get("mode")
+            == OutputMode.STRUCTURED_OUTPUT.value
+        )
+        tools = self.config.get("tools", None)
+        model = self.config.get("model", self.default_model)
+        timeout = self.config.get("timeout", 120)
+        validate_rules = self.config.get("validate", None)
+        skip_on_error = self.config.get("skip_on_error", False)
+        pdf_url_key = self.config.get("pdf_url_key", None)
+        bypass_cache = self.config.get("bypass_cache", self.bypass_cache)
+        use_semantic_cache = (
+            self._semantic_cache is not None and not pdf_url_key and not bypass_cache
+        )
+        semantic_cache_failed = threading.Event()
+
+        def _semantic_cache_embedding(
+            item: Dict,
+        ) -> Tuple[Optional[List[float]], float]:
+            """
+            Embed the content the prompt fills in from the item, leaving out
+            the template's own text: shared boilerplate would otherwise
+            dominate the embedding and make distinct inputs look alike.
+            """
+            text = strict_render(
+                compile_variables_template(self.config["prompt"]), {"input": item}
+            )
+            if not text.strip():
+                return None, 0.0
+            try:
+                embedding_response = self.runner.api.gen_embedding(
+                    self.config.get(
+                        "semantic_cache_embedding_model", "text-embedding-3-small"
+                    ),
+                    [text],
+                )
+            except Exception as e:
+                # E.g. the input is over the embedding model's token limit; the
+                # item is still answered, just without the semantic cache
+                if not semantic_cache_failed.is_set():
+                    semantic_cache_failed.set()
+                    self.console.log(
+                        f"[bold yellow]Semantic cache lookup failed for map ({self.config['name']}); calling the LLM directly:[/bold yellow] {e}"
+                    )
+                return None, 0.0
+            return (
+                embedding_response["data"][0]["embedding"],
+                completion_cost(embedding_response),
+            )
+
         def _process_map_item(
-            item: Dict, initial_result: Optional[Dict] = None
+            item: Dict,
+            initial_result: Optional[Dict] = None,
+            prompt: Optional[str] = None,
         ) -> Tuple[Optional[List[Dict]], float]:
 
-            prompt = strict_render(self.config["prompt"], {"input": item})
+            if prompt is None:
+                prompt = strict_render(self.config["prompt"], {"input": item})
             messages = [{"role": "user", "content": prompt}]
-            if self.config.get("pdf_url_key", None):
+            if self._calibration_context:
+                messages.insert(
+                    0, {"role": "system", "content": self._calibration_context}
+                )
+            if pdf_url_key:
                 # Append the pdf to the prompt
                 try:
-                    pdf_url = item[self.config["pdf_url_key"]]
+                    pdf_url = item[pdf_url_key]
                 except KeyError:
                     raise ValueError(
-                        f"PDF URL key '{self.config['pdf_url_key']}' not found in input data"
+                        f"PDF URL key '{pdf_url_key}' not found in input data"
                     )
 
-                # Download content
-                if pdf_url.startswith("http"):
-                    file_data = requests.get(pdf_url).content
-                else:
-                    with open(pdf_url, "rb") as f:
-                        file_data = f.read()
-                encoded_file = base64.b64encode(file_data).decode("utf-8")
-                base64_url = f"data:application/pdf;base64,{encoded_file}"
+                base64_url = self._load_pdf(pdf_url)
 
-                messages[0]["content"] = [
+                messages[-1]["content"] = [
                     {"type": "image_url", "image_url": {"url": base64_url}},
                     {"type": "text", "text": prompt},
                 ]
 
+            # Prompts that are near-duplicates of one already answered reuse its
+            # output, if it also passes this item's validation rules. PDF inputs
+            # are excluded, since the prompt alone does not identify the document,
+            # and so are items that already have a result from the batch prompt.
+            embedding_cost = 0.0
+            prompt_embedding = None
+            if use_semantic_cache and initial_result is None:
+                prompt_embedding, embedding_cost = _semantic_cache_embedding(item)
+            if prompt_embedding is not None:
+                cached_outputs = self._semantic_cache.get(prompt_embedding)
+                if cached_outputs is not None:
+                    # Cached outputs are shared by every hit, so each result
+                    # gets its own copy of their nested values
+                    outputs = [
+                        {**item, **copy.deepcopy(output)} for output in cached_outputs
+                    ]
+                    if not validate_rules or all(
+                        self.runner.api.validate_output(
+                            self.config, output, self.console
+                        )
+                        for output in outputs
+                    ):
+                        if self.config.get("enable_observability", False):
+                            for output in outputs:
+                                output[f"_observability_{self.config['name']}"] = {
+                                    "prompt": prompt
+                                }
+                        return outputs, embedding_cost
+
+            # Input keys outside the schema are copied into every validated output
+            item_extra_keys = [key for key in item if key not in schema_keys]
+
+            # The last (response, parsed outputs) pair seen by validation_fn, so
+            # a response that passes validation isn't parsed a second time
+            last_parsed: List[Tuple[ModelResponse, List[Dict]]] = []
+
             def validation_fn(response: Union[Dict[str, Any], ModelResponse]):
-                structured_mode = (
-                    self.config.get("output", {}).get("mode")
-                    == OutputMode.STRUCTURED_OUTPUT.value
-                )
-                output = (
-                    self.runner.api.parse_llm_response(
+                if isinstance(response, ModelResponse):
+                    parsed = self.runner.api.parse_llm_response(
                         response,
-                        schema=self.config["output"]["schema"],
-                        tools=self.config.get("tools", None),
+                        schema=schema,
+                        tools=tools,
                         manually_fix_errors=self.manually_fix_errors,
                         use_structured_output=structured_mode,
-                    )[0]
-                    if isinstance(response, ModelResponse)
-                    else response
-                )
+                    )
+                    last_parsed[:] = [(response, parsed)]
+                    output = parsed[0]
+                else:
+                    output = response
                 # Check that the output has all the keys in the schema
-                for key in self.config["output"]["schema"]:
-                    if key not in output:
-                        return output, False
+                if not schema_keys.issubset(output.keys()):
+                    return output, False
 
-                for key, value in item.items():
-                    if key not in self.config["output"]["schema"]:
-                        output[key] = value
+                for key in item_extra_keys:
+                    output[key] = item[key]
                 if self.runner.api.validate_output(self.config, output, self.console):
                     return output, True
                 return output, False
@@ -357,26 +704,26 @@ Reference anchors:"""
             if self.runner.is_cancelled:
                 raise asyncio.CancelledError("Operation was cancelled")
             llm_result = self.runner.api.call_llm(
-                self.config.get("model", self.default_model),
+                model,
                 "map",
                 messages,
-                self.config["output"]["schema"],
-                tools=self.config.get("tools", None),
+                schema,
+                tools=tools,
                 scratchpad=None,
-                timeout_seconds=self.config.get("timeout", 120),
+                timeout_seconds=timeout,
                 max_retries_per_timeout=self.config.get("max_retries_per_timeout", 2),
                 validation_config=(
                     {
                         "num_retries": self.num_retries_on_validate_failure,
-                        "val_rule": self.config.get("validate", []),
+                        "val_rule": validate_rules,
                         "validation_fn": validation_fn,
                     }
-                    if self.config.get("validate", None)
+                    if validate_rules
                     else None
                 ),
                 gleaning_config=self.config.get("gleaning", None),
                 verbose=self.config.get("verbose", False),
-                bypass_cache=self.config.get("bypass_cache", self.bypass_cache),
+                bypass_cache=bypass_cache,
                 initial_result=initial_result,
                 litellm_completion_kwargs=self.config.get(
                     "litellm_completion_kwargs", {}
@@ -385,22 +732,35 @@ Reference anchors:"""
             )
 
             if llm_result.validated:
-                # Parse the response
-                if isinstance(llm_result.response, ModelResponse):
-                    structured_mode = (
-                        self.config.get("output", {}).get("mode")
-                        == OutputMode.STRUCTURED_OUTPUT.value
-                    )
+                # Parse the response, unless validation already did
+                if last_parsed and last_parsed[0][0] is llm_result.response:
+                    outputs = last_parsed[0][1]
+                elif isinstance(llm_result.response, ModelResponse):
                     outputs = self.runner.api.parse_llm_response(
                         llm_result.response,
-                        schema=self.config["output"]["schema"],
-                        tools=self.config.get("tools", None),
+                        schema=schema,
+                        tools=tools,
                         manually_fix_errors=self.manually_fix_errors,
                         use_structured_output=structured_mode,
                     )
                 else:
                     outputs = [llm_result.response]
 
+                if prompt_embedding is not None:
+                    self._semantic_cache.set(
+                        prompt_embedding,
+                        copy.deepcopy(
+                            [
+                                {
+                                    k: v
+                                    for k, v in output.items()
+                                    if k not in item or k in schema_keys
+                                }
+                                for output in outputs
+                            ]
+                        ),
+                    )
+
                 # Augment the output with the original item
                 outputs = [{**item, **output} for output in outputs]
                 if self.config.get("enable_observability", False):
@@ -408,16 +768,29 @@ Reference anchors:"""
                         output[f"_observability_{self.config['name']}"] = {
                             "prompt": prompt
                         }
-                return outputs, llm_result.total_cost
-
-            return None, llm_result.total_cost
+                return outputs, llm_result.total_cost + embedding_cost
+
+            return None, llm_result.total_cost + embedding_cost
+
+        # Renders each item's prompt and, if there's a batch prompt, uses that to
+        # get initial results. Returns (item, initial result, prompt) triples.
+        def _process_map_batch(
+            items: List[Dict],
+        ) -> Tuple[List[Tuple[Dict, Optional[Dict], Optional[str]]], float]:
+            # Render every prompt of the batch in one sweep, so item workers
+            # only have to make their LLM calls. Items that fail to render are
+            # left for _process_map_item, so the error surfaces (and can be
+            # skipped) per item.
+            def _render_prompt(item: Dict) -> Optional[str]:
+                try:
+                    return strict_render(self.config["prompt"], {"input": item})
+                except Exception:
+                    return None
 
-        # If there's a batch prompt, let's use that
-        def _process_map_batch(items: List[Dict]) -> Tuple[List[Dict], float]:
-            total_cost = 0
+            prompts = [_render_prompt(item) for item in items]
             if len(items) > 1 and self.config.get("batch_prompt", None):
                 # Raise error if pdf_url_key is set
-                if self.config.get("pdf_url_key", None):
+                if pdf_url_key:
                     raise ValueError("Batch prompts do not support PDF URLs")
 
                 batch_prompt = strict_render(
@@ -426,122 +799,188 @@ Reference anchors:"""
 
                 # Issue the batch call
                 llm_result = self.runner.api.call_llm_batch(
-                    self.config.get("model", self.default_model),
+                    model,
                     "batch map",
                     [{"role": "user", "content": batch_prompt}],
-                    self.config["output"]["schema"],
+                    schema,
                     verbose=self.config.get("verbose", False),
-                    timeout_seconds=self.config.get("timeout", 120),
+                    timeout_seconds=timeout,
                     max_retries_per_timeout=self.config.get(
                         "max_retries_per_timeout", 2
                     ),
-                    bypass_cache=self.config.get("bypass_cache", self.bypass_cache),
+                    bypass_cache=bypass_cache,
                     litellm_completion_kwargs=self.config.get(
                         "litellm_completion_kwargs", {}
                     ),
                 )
-                total_cost += llm_result.total_cost
 
                 # Parse the LLM response
-                structured_mode = (
-                    self.config.get("output", {}).get("mode")
-                    == OutputMode.STRUCTURED_OUTPUT.value
-                )
                 parsed_output = self.runner.api.parse_llm_response(
                     llm_result.response,
-                    self.config["output"]["schema"],
+                    schema,
                     use_structured_output=structured_mode,
                 )[0].get("results", [])
+                if len(parsed_output) < len(items):
+                    self.console.log(
+                        f"[bold yellow]Batch prompt for map {self.config['name']} returned {len(parsed_output)} results for {len(items)} documents; the missing ones will be processed individually.[/bold yellow]"
+                    )
+                # Items without a batch result get None and are processed from scratch
                 items_and_outputs = [
-                    (item, parsed_output[idx] if idx < len(parsed_output) else None)
-                    for idx, item in enumerate(items)
+                    (item, output, prompt)
+                    for item, prompt, output in zip_longest(
+                        items, prompts, parsed_output[: len(items)]
+                    )
                 ]
-            else:
-                items_and_outputs = [(item, None) for item in items]
-
-            # Run _process_map_item for each item
-            all_results = []
-            if len(items_and_outputs) > 1:
-                with ThreadPoolExecutor(max_workers=self.max_batch_size) as executor:
-                    futures = [
-                        executor.submit(
-                            _process_map_item,
-                            items_and_outputs[i][0],
-                            items_and_outputs[i][1],
+                return items_and_outputs, llm_result.total_cost
+
+            return [(item, None, prompt) for item, prompt in zip(items, prompts)], 0.0
+
+        batch_size = self.max_batch_size if self.max_batch_size is not None else 1
+        batches = [
+            input_data[i : i + batch_size]
+            for i in range(0, len(input_data), batch_size)
+        ]
+        # LLM calls are I/O bound, so a single event loop schedules every item
+        # on the runner's shared I/O pool and caps this operation's in-flight
+        # calls at max_threads, whatever the batch size
+        max_concurrency = self.max_threads or 64
+
+        # Running cost of this execute call, updated as each call finishes so
+        # the progress bar and runner.api.on_cost can report it live
+        cost_lock = threading.Lock()
+        running_cost = 0.0
+
+        def _record_cost(cost: float, report: bool = True) -> None:
+            nonlocal running_cost
+            if not cost:
+                return
+            with cost_lock:
+                running_cost += cost
+            on_cost = self.runner.api.on_cost
+            if report and on_cost is not None:
+                on_cost(cost)
+
+        async def _execute_batches(
+            executor: ThreadPoolExecutor,
+        ) -> List[Dict]:
+            semaphore = asyncio.Semaphore(max_concurrency)
+            loop = asyncio.get_running_loop()
+
+            async def _guarded(fn: Callable[..., T], *args: Any) -> T:
+                async with semaphore:
+                    return await loop.run_in_executor(executor, fn, *args)
+
+            async def _aprocess_map_item(
+                item: Dict,
+                initial_result: Optional[Dict] = None,
+                prompt: Optional[str] = None,
+            ) -> Optional[List[Dict]]:
+                cached = self._calibration_cache.pop(id(item), None)
+                # The calibration pass already reported a reused result's cost
+                reused = cached is not None
+                if cached is None:
+                    try:
+                        cached = await _guarded(
+                            _process_map_item, item, initial_result, prompt
                         )
-                        for i in range(len(items_and_outputs))
-                    ]
-                    for i in range(len(futures)):
-                        try:
-                            results, item_cost = futures[i].result()
-                            if results is not None:
-                                all_results.extend(results)
-                            total_cost += item_cost
-                        except Exception as e:
-                            if self.config.get("skip_on_error", False):
-                                self.console.log(
-                                    f"[bold red]Error in map operation {self.config['name']}, skipping item:[/bold red] {e}"
-                                )
-                                continue
-                            else:
-                                raise e
-            else:
-                try:
-                    results, item_cost = _process_map_item(
-                        items_and_outputs[0][0], items_and_outputs[0][1]
+                    except Exception as e:
+                        if skip_on_error:
+                            self.console.log(
+                                f"[bold red]Error in map operation {self.config['name']}, skipping item:[/bold red] {e}"
+                            )
+                            return None
+                        raise e
+                    if self._recording_calibration and cached[0] is not None:
+                        # Subclasses (e.g. filter) may edit the returned
+                        # results in place, so the main pass gets copies
+                        self._calibration_cache[id(item)] = (
+                            [dict(result) for result in cached[0]],
+                            cached[1],
+                        )
+                results, item_cost = cached
+                _record_cost(item_cost, report=not reused)
+                return results
+
+            async def _aprocess_map_batch(items: List[Dict]) -> List[Dict]:
+                items_and_outputs, batch_cost = await _guarded(
+                    _process_map_batch, items
+                )
+                _record_cost(batch_cost)
+                # Launch the longest prompts (typically the slowest calls)
+                # first to shorten the batch's tail, but keep results in order
+                launch_order = sorted(
+                    range(len(items_and_outputs)),
+                    key=lambda idx: len(items_and_outputs[idx][2] or ""),
+                    reverse=True,
+                )
+                item_tasks = {
+                    idx: asyncio.create_task(
+                        _aprocess_map_item(*items_and_outputs[idx])
                     )
+                    for idx in launch_order
+                }
+                item_results = await asyncio.gather(
+                    *[item_tasks[idx] for idx in range(len(items_and_outputs))]
+                )
+                all_results = []
+                for results in item_results:
                     if results is not None:
                         all_results.extend(results)
-                    total_cost += item_cost
-                except Exception as e:
-                    if self.config.get("skip_on_error", False):
-                        self.console.log(
-                            f"[bold red]Error in map operation {self.config['name']}, skipping item:[/bold red] {e}"
-                        )
-                    else:
-                        raise e
-
-            return all_results, total_cost
-
-        with ThreadPoolExecutor(max_workers=self.max_batch_size) as executor:
-            batch_size = self.max_batch_size if self.max_batch_size is not None else 1
-            futures = []
-            for i in range(0, len(input_data), batch_size):
-                batch = input_data[i : i + batch_size]
-                futures.append(executor.submit(_process_map_batch, batch))
-            results = []
-            total_cost = 0
-            pbar = RichLoopBar(
-                range(len(futures)),
+                return all_results
+
+            # A fixed set of max_threads workers pull batches from one shared
+            # iterator, so batches are rendered only as they are about to be
+            # sent, and each batch is reported (and checkpointed) as soon as
+            # it finishes rather than after every batch has been prepared
+            pending = enumerate(batches)
+            batch_results: List[List[Dict]] = [[] for _ in batches]
+            with RichLoopBar(
+                total=len(batches),
                 desc=f"Processing {self.config['name']} (map) on all documents",
                 console=self.console,
-            )
-            for batch_index in pbar:
-                result_list, item_cost = futures[batch_index].result()
-                if result_list:
-                    if "drop_keys" in self.config:
-                        result_list = [
-                            {
-                                k: v
-                                for k, v in result.items()
-                                if k not in self.config["drop_keys"]
-                            }
-                            for result in result_list
-                        ]
-                    results.extend(result_list)
-                    # --- BEGIN: Flush partial checkpoint ---
-                    if self.config.get("flush_partial_results", False):
-                        op_name = self.config["name"]
-                        self.runner._flush_partial_results(
-                            op_name, batch_index, result_list
-                        )
-                    # --- END: Flush partial checkpoint ---
-                total_cost += item_cost
+            ) as pbar:
+
+                async def _worker() -> None:
+                    for batch_index, batch in pending:
+                        result_list = await _aprocess_map_batch(batch)
+                        if result_list:
+                            if drop_keys:
+                                result_list = [
+                                    _drop_keys(result, drop_keys)
+                                    for result in result_list
+                                ]
+                            batch_results[batch_index] = result_list
+                            # --- BEGIN: Flush partial checkpoint ---
+                            # Written off the event loop so that serializing a
+                            # large batch doesn't stall the other workers
+                            if self.config.get("flush_partial_results", False):
+                                op_name = self.config["name"]
+                                await asyncio.to_thread(
+                                    self.runner._flush_partial_results,
+                                    op_name,
+                                    batch_index,
+                                    result_list,
+                                )
+                            # --- END: Flush partial checkpoint ---
+                        pbar.set_postfix_str(f"${running_cost:.4f}")
+                        pbar.update()
+
+                num_workers = min(max_concurrency, len(batches))
+                await asyncio.gather(*(_worker() for _ in range(num_workers)))
+
+            # Keep the output in input order, regardless of completion order
+            return [result for batch in batch_results for result in batch]
+
+        try:
+            results = _run_async(_execute_batches(self.runner.io_executor))
+        finally:
+            if not self._recording_calibration:
+                self._calibration_cache.clear()
 
         if self.status:
             self.status.start()
 
-        return results, total_cost
+        return results, running_cost
 
 
 class ParallelMapOperation(BaseOperation):
@@ -551,6 +990,9 @@ class ParallelMapOperation(BaseOperation):
         output: Dict[str, Any]
         enable_observability: bool = False
         pdf_url_key: Optional[str] = None
+        pdf_cache_size: int = 4
+        use_batch_api: bool = False
+        deep_copy_inputs: bool = False
 
     def __init__(
         self,
@@ -558,6 +1000,8 @@ class ParallelMapOperation(BaseOperation):
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
+        # Every prompt of an item sends the same PDF, so it's encoded once
+        self._load_pdf = _PdfLoader(self.config.get("pdf_cache_size", 4))
 
     def syntax_check(self) -> None:
         """
@@ -580,6 +1024,10 @@ class ParallelMapOperation(BaseOperation):
                 "If 'drop_keys' is not specified, 'prompts' must be present in the configuration"
             )
 
+        pdf_cache_size = self.config.get("pdf_cache_size", 4)
+        if not isinstance(pdf_cache_size, int) or pdf_cache_size < 0:
+            raise ValueError("'pdf_cache_size' must be a non-negative integer")
+
         if "prompts" in self.config:
             if not isinstance(self.config["prompts"], list):
                 raise ValueError(
@@ -614,9 +1062,16 @@ class ParallelMapOperation(BaseOperation):
                         f"'output_keys' list in prompt configuration {i} cannot be empty"
                     )
 
+                if self.config.get("use_batch_api", False) and (
+                    prompt_config.get("tools") or prompt_config.get("gleaning")
+                ):
+                    raise ValueError(
+                        f"Prompt configuration {i} uses tools or gleaning, which 'use_batch_api' does not support"
+                    )
+
                 # Check if the prompt is a valid Jinja2 template
                 try:
-                    Template(prompt_config["prompt"])
+                    compile_strict_template(prompt_config["prompt"])
                 except Exception as e:
                     raise ValueError(
                         f"Invalid Jinja2 template in prompt configuration {i}: {str(e)}"
@@ -659,138 +1114,277 @@ class ParallelMapOperation(BaseOperation):
         4. If drop_keys is specified, it drops the specified keys from each document
         5. Calculates total cost of the operation
         """
-        results = {}
         total_cost = 0
         output_schema = self.config.get("output", {}).get("schema", {})
 
         # Check if there's no prompt and only drop_keys
         if "prompts" not in self.config and "drop_keys" in self.config:
             # If only drop_keys is specified, simply drop the keys and return
-            dropped_results = []
-            for item in input_data:
-                new_item = {
-                    k: v for k, v in item.items() if k not in self.config["drop_keys"]
-                }
-                dropped_results.append(new_item)
-            return dropped_results, 0.0  # Return the modified data with no cost
+            drop_keys = _drop_key_set(self.config["drop_keys"])
+            # Return the modified data with no cost
+            return [_drop_keys(item, drop_keys) for item in input_data], 0.0
 
         if self.status:
             self.status.stop()
 
-        def process_prompt(item, prompt_config):
-            prompt = strict_render(prompt_config["prompt"], {"input": item})
-            messages = [{"role": "user", "content": prompt}]
-            if self.config.get("pdf_url_key", None):
+        # Config lookups shared by every call, resolved once per execute call
+        pdf_url_key = self.config.get("pdf_url_key", None)
+        timeout = self.config.get("timeout", 120)
+        max_retries_per_timeout = self.config.get("max_retries_per_timeout", 2)
+        bypass_cache = self.config.get("bypass_cache", self.bypass_cache)
+        litellm_completion_kwargs = self.config.get("litellm_completion_kwargs", {})
+        structured_mode = (
+            self.config.get("output", {}).get("mode")
+            == OutputMode.STRUCTURED_OUTPUT.value
+        )
+        observability_key = (
+            f"_observability_{self.config['name']}"
+            if self.config.get("enable_observability", False)
+            else None
+        )
+
+        def report_cost(cost: float) -> None:
+            # Report each call's cost as it completes, as map does
+            on_cost = self.runner.api.on_cost
+            if cost and on_cost is not None:
+                on_cost(cost)
+
+        def build_messages(item: Dict, prompt: str) -> List[Dict]:
+            messages: List[Dict[str, Any]] = [{"role": "user", "content": prompt}]
+            if pdf_url_key:
                 try:
-                    pdf_url = item[self.config["pdf_url_key"]]
+                    pdf_url = item[pdf_url_key]
                 except KeyError:
                     raise ValueError(
-                        f"PDF URL key '{self.config['pdf_url_key']}' not found in input data"
+                        f"PDF URL key '{pdf_url_key}' not found in input data"
                     )
-                # Download content
-                if pdf_url.startswith("http"):
-                    file_data = requests.get(pdf_url).content
-                else:
-                    with open(pdf_url, "rb") as f:
-                        file_data = f.read()
-                encoded_file = base64.b64encode(file_data).decode("utf-8")
-                base64_url = f"data:application/pdf;base64,{encoded_file}"
+                base64_url = self._load_pdf(pdf_url)
 
                 messages[0]["content"] = [
                     {"type": "image_url", "image_url": {"url": base64_url}},
                     {"type": "text", "text": prompt},
                 ]
+            return messages
 
-            local_output_schema = {
-                key: output_schema.get(key, "string")
-                for key in prompt_config["output_keys"]
-            }
-            model = prompt_config.get("model", self.default_model)
-            if not model:
-                model = self.default_model
+        def parse_output(response: Any, spec: _PromptSpec) -> Dict:
+            outputs: List[Dict] = self.runner.api.parse_llm_response(
+                response,
+                schema=spec.output_schema,
+                tools=spec.tools,
+                manually_fix_errors=self.manually_fix_errors,
+                use_structured_output=structured_mode,
+            )
+            return outputs[0]
+
+        def render_prompt(members: List[Tuple[int, int]]) -> str:
+            # Calls only keep a digest of their prompt, so it is rendered
+            # again when the call is made
+            item_index, prompt_index = members[0]
+            return strict_render(
+                prompt_specs[prompt_index].prompt, {"input": input_data[item_index]}
+            )
 
-            # Start of Selection
+        def process_prompt(members: List[Tuple[int, int]]) -> Tuple[str, LLMResult]:
+            item_index, prompt_index = members[0]
+            item = input_data[item_index]
+            spec = prompt_specs[prompt_index]
+            prompt = render_prompt(members)
             # If there are tools, we need to pass in the tools
-            response = self.runner.api.call_llm(
-                model,
+            result: LLMResult = self.runner.api.call_llm(
+                spec.model,
                 "parallel_map",
-                messages,
-                local_output_schema,
-                tools=prompt_config.get("tools", None),
-                timeout_seconds=self.config.get("timeout", 120),
-                max_retries_per_timeout=self.config.get("max_retries_per_timeout", 2),
-                gleaning_config=prompt_config.get("gleaning", None),
-                bypass_cache=self.config.get("bypass_cache", self.bypass_cache),
-                litellm_completion_kwargs=self.config.get(
-                    "litellm_completion_kwargs", {}
-                ),
+                build_messages(item, prompt),
+                spec.output_schema,
+                tools=spec.tools,
+                timeout_seconds=timeout,
+                max_retries_per_timeout=max_retries_per_timeout,
+                gleaning_config=spec.gleaning,
+                bypass_cache=bypass_cache,
+                litellm_completion_kwargs=litellm_completion_kwargs,
                 op_config=self.config,
             )
-            structured_mode = (
-                self.config.get("output", {}).get("mode")
-                == OutputMode.STRUCTURED_OUTPUT.value
+            return prompt, result
+
+        def merge_output(
+            prompt: str, members: List[Tuple[int, int]], output: Dict
+        ) -> None:
+            for member_index, (item_index, prompt_index) in enumerate(members):
+                # Items sharing a call each get their own copy, so nested
+                # values aren't shared
+                item_outputs[item_index][prompt_index] = (
+                    copy.deepcopy(output) if member_index else output
+                )
+                if observability_key:
+                    item_prompts[item_index][prompt_index] = prompt
+
+        def _execute_batch_api(
+            calls: List[List[Tuple[int, int]]],
+        ) -> Tuple[float, List[List[Tuple[int, int]]]]:
+            # Sends every call as one OpenAI batch; returns the cost and the
+            # calls that didn't come back, so they can be made individually
+            batch_calls = {}
+            for members in calls:
+                item_index, prompt_index = members[0]
+                spec = prompt_specs[prompt_index]
+                batch_calls[f"{item_index}-{prompt_index}"] = (
+                    spec.model,
+                    build_messages(input_data[item_index], render_prompt(members)),
+                    spec.output_schema,
+                )
+
+            responses = self.runner.api.call_llm_batch_api(
+                batch_calls,
+                "parallel_map",
+                bypass_cache=bypass_cache,
+                litellm_completion_kwargs=litellm_completion_kwargs,
+                op_config=self.config,
             )
-            output = self.runner.api.parse_llm_response(
-                response.response,
-                schema=local_output_schema,
-                tools=prompt_config.get("tools", None),
-                manually_fix_errors=self.manually_fix_errors,
-                use_structured_output=structured_mode,
-            )[0]
-            return output, prompt, response.total_cost
-
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            if "prompts" in self.config:
-                # Create all futures at once
-                all_futures = [
-                    executor.submit(process_prompt, item, prompt_config)
-                    for item in input_data
-                    for prompt_config in self.config["prompts"]
-                ]
 
-                # Process results in order
-                for i in tqdm(
-                    range(len(all_futures)),
-                    desc="Processing parallel map items",
-                ):
-                    future = all_futures[i]
-                    output, prompt, cost = future.result()
-                    total_cost += cost
-
-                    # Determine which item this future corresponds to
-                    item_index = i // len(self.config["prompts"])
-                    prompt_index = i % len(self.config["prompts"])
-
-                    # Initialize or update the item_result
-                    if prompt_index == 0:
-                        item_result = input_data[item_index].copy()
-                        results[item_index] = item_result
-
-                    # Fetch the item_result
-                    item_result = results[item_index]
-
-                    if self.config.get("enable_observability", False):
-                        if f"_observability_{self.config['name']}" not in item_result:
-                            item_result[f"_observability_{self.config['name']}"] = {}
-                        item_result[f"_observability_{self.config['name']}"].update(
-                            {f"prompt_{prompt_index}": prompt}
+            total_cost = 0.0
+            missing = []
+            for members in calls:
+                item_index, prompt_index = members[0]
+                response = responses.get(f"{item_index}-{prompt_index}")
+                if response is None:
+                    missing.append(members)
+                    continue
+                total_cost += response.total_cost
+                report_cost(response.total_cost)
+                output = parse_output(response.response, prompt_specs[prompt_index])
+                merge_output(render_prompt(members), members, output)
+
+            if missing:
+                self.console.log(
+                    f"[bold yellow]{len(missing)} batch API calls for {self.config['name']} (parallel_map) failed; retrying them individually.[/bold yellow]"
+                )
+            return total_cost, missing
+
+        async def _execute_prompts(
+            executor: ThreadPoolExecutor,
+            parse_executor: ThreadPoolExecutor,
+            calls: List[List[Tuple[int, int]]],
+        ) -> float:
+            # A fixed set of max_threads workers pull calls from one shared
+            # iterator, so only the calls in flight have a task and a future,
+            # however many calls there are in total
+            loop = asyncio.get_running_loop()
+            pending = iter(calls)
+            parse_tasks: List[asyncio.Task[None]] = []
+            total_cost = 0.0
+
+            with tqdm(total=len(calls), desc="Processing parallel map items") as pbar:
+
+                async def _parse_and_merge(
+                    prompt: str, members: List[Tuple[int, int]], response: Any
+                ) -> None:
+                    output = await loop.run_in_executor(
+                        parse_executor,
+                        parse_output,
+                        response,
+                        prompt_specs[members[0][1]],
+                    )
+                    # Merge each output as soon as it is parsed
+                    merge_output(prompt, members, output)
+                    pbar.update()
+
+                async def _worker() -> None:
+                    nonlocal total_cost
+                    for members in pending:
+                        prompt, response = await loop.run_in_executor(
+                            executor, process_prompt, members
+                        )
+                        total_cost += response.total_cost
+                        report_cost(response.total_cost)
+                        # Parsing happens on its own pool, so this worker can
+                        # start its next call right away
+                        parse_tasks.append(
+                            asyncio.create_task(
+                                _parse_and_merge(prompt, members, response.response)
+                            )
                         )
 
-                    # Update the item_result with the output
-                    item_result.update(output)
-
-            else:
-                results = {i: item.copy() for i, item in enumerate(input_data)}
+                num_workers = min(self.max_threads or 64, len(calls))
+                await asyncio.gather(*(_worker() for _ in range(num_workers)))
+                await asyncio.gather(*parse_tasks)
+            return total_cost
+
+        # Prompt outputs are stored, in whatever order they complete, by item
+        # and prompt index. They are merged in prompt order when the results
+        # are assembled, so a later prompt always wins a shared output key,
+        # and each input item is copied once.
+        item_outputs: List[Dict[int, Dict]] = [{} for _ in input_data]
+        # Rendered prompts are only kept when observability is enabled
+        item_prompts: List[Dict[int, str]] = [{} for _ in input_data]
+        if "prompts" in self.config:
+            prompt_specs = [
+                _PromptSpec(
+                    prompt=prompt_config["prompt"],
+                    model=prompt_config.get("model") or self.default_model,
+                    tools=prompt_config.get("tools", None),
+                    gleaning=prompt_config.get("gleaning", None),
+                    output_schema={
+                        key: output_schema.get(key, "string")
+                        for key in prompt_config["output_keys"]
+                    },
+                )
+                for prompt_config in self.config["prompts"]
+            ]
+            # Each call is the list of (item, prompt) pairs it answers. Pairs
+            # that render the same prompt (for the same PDF) share one call,
+            # just as the response cache would serve them one after another.
+            # Calls with user tools, which may have side effects, and calls
+            # that bypass the cache are never shared. Prompts are grouped by
+            # digest, so only the prompts in flight are held in memory.
+            grouped_calls: Dict[Tuple[Any, ...], List[Tuple[int, int]]] = {}
+            for item_index, item in enumerate(input_data):
+                for prompt_index, spec in enumerate(prompt_specs):
+                    key: Tuple[Any, ...]
+                    if bypass_cache or spec.tools:
+                        key = (item_index, prompt_index)
+                    else:
+                        prompt = strict_render(spec.prompt, {"input": item})
+                        pdf_url = item.get(pdf_url_key) if pdf_url_key else None
+                        key = (
+                            prompt_index,
+                            hashlib.sha256(prompt.encode()).digest(),
+                            pdf_url,
+                        )
+                    grouped_calls.setdefault(key, []).append((item_index, prompt_index))
+            calls = list(grouped_calls.values())
+            if calls and self.config.get("use_batch_api", False):
+                total_cost, calls = _execute_batch_api(calls)
+            if calls:
+                # Parsing is CPU-bound, so a couple of threads are plenty
+                with ThreadPoolExecutor(
+                    max_workers=min(4, os.cpu_count() or 1),
+                    thread_name_prefix="docetl-parse",
+                ) as parse_executor:
+                    total_cost += _run_async(
+                        _execute_prompts(self.runner.io_executor, parse_executor, calls)
+                    )
+        # Results share nested values (lists, dicts) with the input items by
+        # default; deep_copy_inputs copies them, so later in-place edits to
+        # the results can't leak back into the inputs
+        if self.config.get("deep_copy_inputs", False):
+            input_data = copy.deepcopy(input_data)
+        results = []
+        for item, outputs, prompts in zip(input_data, item_outputs, item_prompts):
+            item_result = dict(item)
+            if observability_key and prompts:
+                item_result[observability_key] = {
+                    f"prompt_{prompt_index}": prompts[prompt_index]
+                    for prompt_index in sorted(prompts)
+                }
+            for prompt_index in sorted(outputs):
+                item_result.update(outputs[prompt_index])
+            results.append(item_result)
 
         # Apply drop_keys if specified
         if "drop_keys" in self.config:
-            drop_keys = self.config["drop_keys"]
-            for item in results.values():
-                for key in drop_keys:
-                    item.pop(key, None)
+            drop_keys = _drop_key_set(self.config["drop_keys"])
+            results = [_drop_keys(item, drop_keys) for item in results]
 
         if self.status:
             self.status.start()
 
-        # Return the results in order
-        return [results[i] for i in range(len(input_data)) if i in results], total_cost
+        return results, total_cost
@@ -8,6 +8,7 @@ from .cache import (
     CACHE_DIR,
     LLM_CACHE_DIR,
     DOCETL_HOME_DIR,
+    SemanticCache,
 )
 from .llm import LLMResult, InvalidOutputError, truncate_messages
 from .progress import RichLoopBar, rich_as_completed
@@ -23,6 +24,7 @@ __all__ = [
     'CACHE_DIR',
     'LLM_CACHE_DIR',
     'DOCETL_HOME_DIR',
+    'SemanticCache',
     'LLMResult',
     'InvalidOutputError',
     'RichLoopBar',
@@ -6,15 +6,21 @@ import os
 import re
 import time
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from litellm import (
     APIConnectionError,
     ModelResponse,
     RateLimitError,
     ServiceUnavailableError,
+    cancel_batch,
     completion,
+    create_batch,
+    create_file,
     embedding,
+    file_content,
+    get_llm_provider,
+    retrieve_batch,
 )
 from litellm.types.utils import ChatCompletionMessageToolCall, Function
 from rich import print as rprint
@@ -67,6 +73,9 @@ class APIWrapper(object):
         self.default_embedding_api_base = runner.config.get(
             "default_embedding_api_base", None
         )
+        # Optional callback invoked with the cost of each completed LLM call,
+        # e.g. to display a running total or enforce a budget
+        self.on_cost: Optional[Callable[[float], None]] = None
 
     @freezeargs
     def gen_embedding(self, model: str, input: List[str]) -> List[float]:
@@ -155,6 +164,149 @@ class APIWrapper(object):
             op_config=op_config,
         )
 
+    def call_llm_batch_api(
+        self,
+        calls: Dict[str, Tuple[str, List[Dict[str, Any]], Dict[str, Any]]],
+        op_type: str,
+        bypass_cache: bool = False,
+        litellm_completion_kwargs: Dict[str, Any] = {},
+        op_config: Dict[str, Any] = {},
+        poll_interval: float = 30,
+    ) -> Dict[str, LLMResult]:
+        """
+        Run many LLM calls through OpenAI's Batch API, which bills at half the
+        per-token price and doesn't count against per-request rate limits, but
+        may take up to 24 hours. Blocks until the batch has finished.
+
+        Calls already in the cache are answered from it, and every response
+        from the batch is cached, under the same key call_llm would use.
+
+        Args:
+            calls (Dict[str, Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]): (model, messages, output_schema) for each call, keyed by a unique id.
+            op_type (str): The operation type.
+            bypass_cache (bool): Whether to bypass the cache.
+            litellm_completion_kwargs (Dict[str, Any]): Extra completion parameters, e.g. temperature.
+            op_config (Dict[str, Any]): The operation config.
+            poll_interval (float): Seconds to wait between checks of the batch status.
+
+        Returns:
+            Dict[str, LLMResult]: The result of each call, keyed by its id. Calls that failed within the batch are left out.
+
+        Raises:
+            ValueError: If a model isn't served by OpenAI, or a custom api_base is configured.
+            RuntimeError: If the batch as a whole failed.
+        """
+        # Batches are always submitted to OpenAI itself, so a proxy or
+        # OpenAI-compatible host would silently be bypassed
+        if self.default_lm_api_base or "api_base" in litellm_completion_kwargs:
+            raise ValueError(
+                "The batch API can't be used with a custom api_base (e.g. default_lm_api_base)"
+            )
+        use_structured_output = (
+            op_config.get("output", {}).get("mode")
+            == OutputMode.STRUCTURED_OUTPUT.value
+        )
+        results = {}
+        keys = {}
+        lines = []
+        with cache as c:
+            for custom_id, (model, messages, output_schema) in calls.items():
+                key = cache_key(
+                    model,
+                    op_type,
+                    messages,
+                    output_schema,
+                    None,
+                    self.runner.config.get("system_prompt", {}),
+                    op_config,
+                )
+                response = None if bypass_cache else c.get(key)
+                if response is not None:
+                    results[custom_id] = LLMResult(
+                        response=response, total_cost=0.0, validated=True
+                    )
+                    continue
+
+                model_name, provider, _, _ = get_llm_provider(model)
+                if provider != "openai":
+                    raise ValueError(
+                        f"The batch API is only supported for OpenAI models, not '{model}'"
+                    )
+                request = self._completion_request(
+                    model,
+                    op_type,
+                    messages,
+                    output_schema,
+                    litellm_completion_kwargs=litellm_completion_kwargs,
+                    op_config=op_config,
+                    use_structured_output=use_structured_output,
+                )
+                # Client options have no place in the request body
+                request.pop("allowed_openai_params", None)
+                request["model"] = model_name
+                keys[custom_id] = key
+                lines.append(
+                    json.dumps(
+                        {
+                            "custom_id": custom_id,
+                            "method": "POST",
+                            "url": "/v1/chat/completions",
+                            "body": request,
+                        }
+                    )
+                )
+
+        if not lines:
+            return results
+
+        input_file = create_file(
+            file=("docetl_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+            custom_llm_provider="openai",
+        )
+        batch = create_batch(
+            completion_window="24h",
+            endpoint="/v1/chat/completions",
+            input_file_id=input_file.id,
+            custom_llm_provider="openai",
+        )
+        self.runner.console.log(
+            f"Submitted {len(lines)} {op_type} calls to the OpenAI batch API as {batch.id}; waiting for the batch to finish"
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if self.runner.is_cancelled:
+                cancel_batch(batch_id=batch.id, custom_llm_provider="openai")
+                raise asyncio.CancelledError("Operation was cancelled")
+            time.sleep(poll_interval)
+            batch = retrieve_batch(batch_id=batch.id, custom_llm_provider="openai")
+
+        if batch.status == "failed":
+            raise RuntimeError(f"Batch {batch.id} failed: {batch.errors}")
+
+        # Expired or cancelled batches may still have completed some requests
+        if not batch.output_file_id:
+            return results
+        output = file_content(
+            file_id=batch.output_file_id, custom_llm_provider="openai"
+        )
+        with cache as c:
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                model_response = ModelResponse(**response["body"])
+                c.set(keys[record["custom_id"]], model_response)
+                results[record["custom_id"]] = LLMResult(
+                    response=model_response,
+                    # Batch requests are billed at half the regular price
+                    total_cost=completion_cost(model_response) * 0.5,
+                    validated=True,
+                )
+        return results
+
     def _cached_call_llm(
         self,
         cache_key: str,
@@ -595,6 +747,64 @@ class APIWrapper(object):
         Returns:
             str: The response from the LLM.
         """
+        request = self._completion_request(
+            model,
+            op_type,
+            messages,
+            output_schema,
+            tools,
+            scratchpad,
+            litellm_completion_kwargs,
+            op_config=op_config,
+            use_structured_output=use_structured_output,
+        )
+
+        self.runner.blocking_acquire("llm_call", weight=1)
+
+        # Approx the number of tokens in the messages
+        approx_num_tokens = approx_count_tokens(messages)
+        self.runner.blocking_acquire("llm_tokens", weight=approx_num_tokens)
+        if self.runner.is_cancelled:
+            raise asyncio.CancelledError("Operation was cancelled")
+
+        try:
+            return completion(**request)
+        except Exception as e:
+            # Check that there's a prefix for the model name if it's not a basic model
+            if model not in BASIC_MODELS:
+                if "/" not in model:
+                    raise ValueError(
+                        f"Note: You may also need to prefix your model name with the provider, e.g. 'openai/gpt-4o-mini' or 'gemini/gemini-1.5-flash' to conform to LiteLLM API standards. Original error: {e}"
+                    )
+            raise e
+
+    def _completion_request(
+        self,
+        model: str,
+        op_type: str,
+        messages: List[Dict[str, str]],
+        output_schema: Dict[str, str],
+        tools: Optional[str] = None,
+        scratchpad: Optional[str] = None,
+        litellm_completion_kwargs: Dict[str, Any] = {},
+        op_config: Dict[str, Any] = {},
+        use_structured_output: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Build the keyword arguments of a litellm completion call: the messages
+        with the system prompt, the tools or response format that carry the
+        output schema, and any extra completion kwargs.
+
+        Args:
+            model (str): The model name.
+            op_type (str): The operation type.
+            messages (List[Dict[str, str]]): The messages to send to the LLM.
+            output_schema (Dict[str, str]): The output schema dictionary.
+            tools (Optional[str]): The tools to pass to the LLM.
+            scratchpad (Optional[str]): The scratchpad to use for the operation.
+        Returns:
+            Dict[str, Any]: The keyword arguments for litellm.completion.
+        """
         props = {key: convert_val(value) for key, value in output_schema.items()}
         use_tools = True
 
@@ -756,14 +966,6 @@ Your main result must be sent via send_output. The updated_scratchpad is only fo
             model,
         )
 
-        self.runner.blocking_acquire("llm_call", weight=1)
-
-        # Approx the number of tokens in the messages
-        approx_num_tokens = approx_count_tokens(messages)
-        self.runner.blocking_acquire("llm_tokens", weight=approx_num_tokens)
-        if self.runner.is_cancelled:
-            raise asyncio.CancelledError("Operation was cancelled")
-
         extra_litellm_kwargs = {}
         extra_litellm_kwargs.update(litellm_completion_kwargs)
         if "n" in op_config.get("output", {}).keys():
@@ -773,56 +975,17 @@ Your main result must be sent via send_output. The updated_scratchpad is only fo
         if self.default_lm_api_base:
             extra_litellm_kwargs["api_base"] = self.default_lm_api_base
 
+        request = {
+            "model": model,
+            "messages": messages_with_system_prompt,
+            **extra_litellm_kwargs,
+        }
         if use_structured_output:
-            try:
-                response = completion(
-                    model=model,
-                    messages=messages_with_system_prompt,
-                    response_format=response_format,
-                    **extra_litellm_kwargs,
-                )
-            except Exception as e:
-                # Check that there's a prefix for the model name if it's not a basic model
-                if model not in BASIC_MODELS:
-                    if "/" not in model:
-                        raise ValueError(
-                            f"Note: You may also need to prefix your model name with the provider, e.g. 'openai/gpt-4o-mini' or 'gemini/gemini-1.5-flash' to conform to LiteLLM API standards. Original error: {e}"
-                        )
-                raise e
+            request["response_format"] = response_format
         elif tools is not None:
-            try:
-                response = completion(
-                    model=model,
-                    messages=messages_with_system_prompt,
-                    tools=tools,
-                    tool_choice=tool_choice,
-                    **extra_litellm_kwargs,
-                )
-            except Exception as e:
-                # Check that there's a prefix for the model name if it's not a basic model
-                if model not in BASIC_MODELS:
-                    if "/" not in model:
-                        raise ValueError(
-                            f"Note: You may also need to prefix your model name with the provider, e.g. 'openai/gpt-4o-mini' or 'gemini/gemini-1.5-flash' to conform to LiteLLM API standards. Original error: {e}"
-                        )
-                raise e
-        else:
-            try:
-                response = completion(
-                    model=model,
-                    messages=messages_with_system_prompt,
-                    **extra_litellm_kwargs,
-                )
-            except Exception as e:
-                # Check that there's a prefix for the model name if it's not a basic model
-                if model not in BASIC_MODELS:
-                    if "/" not in model:
-                        raise ValueError(
-                            f"Note: You may also need to prefix your model name with the provider, e.g. 'openai/gpt-4o-mini' or 'gemini/gemini-1.5-flash' to conform to LiteLLM API standards. Original error: {e}"
-                        )
-                raise e
-
-        return response
+            request["tools"] = tools
+            request["tool_choice"] = tool_choice
+        return request
 
     def parse_llm_response(
         self,
@@ -3,8 +3,10 @@ import hashlib
 import json
 import os
 import shutil
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 from diskcache import Cache
 from dotenv import load_dotenv
 from frozendict import frozendict
@@ -88,7 +90,7 @@ def cache_key(
     op_type: str,
     messages: List[Dict[str, str]],
     output_schema: Dict[str, str],
-    scratchpad: str = None,
+    scratchpad: Optional[str] = None,
     system_prompt: Dict[str, str] = None,
     op_config: Dict[str, Any] = {},
 ) -> str:
@@ -103,3 +105,58 @@ def cache_key(
         "op_config": json.dumps(op_config, sort_keys=True),
     }
     return hashlib.md5(json.dumps(key_dict, sort_keys=True).encode()).hexdigest()
+
+
+class SemanticCache:
+    """
+    In-memory cache mapping prompt embeddings to LLM outputs.
+
+    A lookup hits when the cosine similarity between the query embedding and
+    a stored embedding is at least ``threshold``. Safe to share across threads.
+    """
+
+    def __init__(self, threshold: float = 0.95):
+        self.threshold = threshold
+        # Normalized embeddings fill the first _size rows; the matrix doubles
+        # in capacity when full, so each insert is amortized O(d)
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._values: List[Any] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding: List[float]) -> Optional[Any]:
+        """Return the value stored for the most similar embedding, if similar enough."""
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None:
+                return None
+            # Rows below _size are never written again, so they can be scored
+            # without holding the lock
+            stored = self._matrix[: self._size]
+        scores = stored @ query
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self._values[best]
+        return None
+
+    def set(self, embedding: List[float], value: Any) -> None:
+        """Store a value under the given embedding."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.empty((16, len(vector)), dtype=np.float32)
+            elif self._size == len(self._matrix):
+                grown = np.empty(
+                    (2 * len(self._matrix), self._matrix.shape[1]), dtype=np.float32
+                )
+                grown[: self._size] = self._matrix
+                self._matrix = grown
+            self._matrix[self._size] = vector
+            self._values.append(value)
+            self._size += 1
@@ -60,6 +60,10 @@ class RichLoopBar:
         if self.tqdm:
             self.tqdm.update(n)
 
+    def set_postfix_str(self, s: str) -> None:
+        if self.tqdm:
+            self.tqdm.set_postfix_str(s, refresh=False)
+
 
 def rich_as_completed(futures, total=None, desc=None, leave=True, console=None):
     """Yield completed futures with a Rich progress bar."""
@@ -1,14 +1,37 @@
+import functools
 import json
 from typing import Any, Dict, Union
 
 from asteval import Interpreter
-from jinja2 import Environment, StrictUndefined, Template
+from jinja2 import Environment, StrictUndefined, Template, nodes
 from jinja2.exceptions import UndefinedError
 from rich import print as rprint
 from rich.prompt import Prompt
 
 aeval = Interpreter()
 
+# Shared strict environment; prompt templates are fixed at config time, so
+# each distinct template string only needs to be compiled once
+_strict_env = Environment(undefined=StrictUndefined)
+
+
+@functools.lru_cache(maxsize=400)
+def compile_strict_template(source: str) -> Template:
+    """Compile a template string in the shared strict environment, caching the result."""
+    return _strict_env.from_string(source)
+
+
+@functools.lru_cache(maxsize=400)
+def compile_variables_template(source: str) -> Template:
+    """
+    Compile a template with its literal text replaced by newlines, so that
+    rendering it yields only the content filled in from its variables.
+    """
+    ast = _strict_env.parse(source)
+    for node in ast.find_all(nodes.TemplateData):
+        node.data = "\n"
+    return _strict_env.from_string(ast)
+
 
 def strict_render(template: Union[Template, str], context: Dict[str, Any]) -> str:
     """
@@ -25,9 +48,6 @@ def strict_render(template: Union[Template, str], context: Dict[str, Any]) -> st
         UndefinedError: When any undefined variable, attribute or index is accessed
         ValueError: When template is invalid
     """
-    # Create strict environment
-    env = Environment(undefined=StrictUndefined)
-
     # Convert string to Template if needed
     if isinstance(template, str):
 
@@ -36,7 +56,7 @@ def strict_render(template: Union[Template, str], context: Dict[str, Any]) -> st
         #     raise UndefinedError("The inputs variable is a list, so you cannot access attributes of inputs. Use inputs[index].key instead.")
 
         try:
-            template = env.from_string(template)
+            template = compile_strict_template(template)
         except Exception as e:
             raise ValueError(f"Invalid template: {str(e)}")
 
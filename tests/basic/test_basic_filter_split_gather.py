@@ -4,7 +4,7 @@ from docetl.operations.unnest import UnnestOperation
 from docetl.operations.equijoin import EquijoinOperation
 from docetl.operations.split import SplitOperation
 from docetl.operations.gather import GatherOperation
-from docetl.operations.utils import APIWrapper
+from docetl.operations.utils import APIWrapper, LLMResult
 from docetl.config_wrapper import ConfigWrapper
 from dotenv import load_dotenv
 from tests.conftest import runner
@@ -54,6 +54,29 @@ def test_filter_operation_empty_input(
     assert cost == 0
 
 
+def test_filter_operation_reuses_calibration_outputs(
+    filter_config, default_model, max_threads, filter_sample_data, runner, monkeypatch
+):
+    # With an empty calibration context, the main pass reuses the outputs of
+    # the calibration pass, which must still have the filter key
+    def call_llm(model, op_type, messages, *args, **kwargs):
+        keep = "more words" in messages[-1]["content"]
+        return LLMResult(response={"keep": keep}, total_cost=0.0, validated=True)
+
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+    monkeypatch.setattr(
+        runner.api,
+        "parse_llm_response",
+        lambda *args, **kwargs: [{"calibration_context": ""}],
+    )
+    operation = FilterOperation(
+        runner, {**filter_config, "calibrate": True}, default_model, max_threads
+    )
+    results, _ = operation.execute(filter_sample_data)
+
+    assert results == [filter_sample_data[1]]
+
+
 # Unnest Operation Tests
 @pytest.fixture
 def unnest_config():
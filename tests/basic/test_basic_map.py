@@ -11,8 +11,10 @@ from tests.conftest import (
     map_config,
     synthetic_data,
 )
+import base64
 import pytest
 import docetl
+from docetl.operations.utils import LLMResult
 
 
 # =============================================================================
@@ -613,4 +615,136 @@ def test_should_glean_condition(runner):
 
     # Case 3: No condition key -> default to True
     assert wrapper.should_glean({}, {"flag": False}) is True
-    assert wrapper.should_glean(None, {"flag": False}) is True
\ No newline at end of file
+    assert wrapper.should_glean(None, {"flag": False}) is True
+
+def test_map_operation_calibration_context_message_layout(
+    runner, tmp_path, monkeypatch
+):
+    """Calibration anchors go in a leading system message; the prompt and PDF stay last."""
+    pdf_path = tmp_path / "doc.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7\n")
+    sent = []
+
+    def call_llm(model, op_type, messages, *args, **kwargs):
+        sent.append((op_type, messages))
+        return LLMResult(
+            response={"sentiment": "positive"}, total_cost=0.0, validated=True
+        )
+
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+    monkeypatch.setattr(
+        runner.api,
+        "parse_llm_response",
+        lambda *args, **kwargs: [{"calibration_context": "Anchor: 'good' -> positive"}],
+    )
+    operation = MapOperation(
+        runner,
+        {
+            "name": "calibrated_pdf_map",
+            "type": "map",
+            "prompt": "Classify {{ input.text }}",
+            "output": {"schema": {"sentiment": "string"}},
+            "pdf_url_key": "pdf",
+            "calibrate": True,
+            "bypass_cache": True,
+        },
+        "gpt-4o-mini",
+        4,
+    )
+    results, _ = operation.execute([{"text": "good", "pdf": str(pdf_path)}])
+
+    assert results[0]["sentiment"] == "positive"
+    # The calibration pass, the calibration call, then the calibrated pass
+    assert [op_type for op_type, _ in sent] == ["map", "calibration", "map"]
+    messages = sent[-1][1]
+    assert messages[0] == {"role": "system", "content": "Anchor: 'good' -> positive"}
+    assert messages[-1]["role"] == "user"
+    assert messages[-1]["content"] == [
+        {
+            "type": "image_url",
+            "image_url": {
+                "url": "data:application/pdf;base64,"
+                + base64.b64encode(b"%PDF-1.7\n").decode()
+            },
+        },
+        {"type": "text", "text": "Classify good"},
+    ]
+    # The uncalibrated pass had no system message
+    assert sent[0][1][0]["role"] == "user"
+
+
+def test_map_operation_renders_prompts_as_workers_free_up(runner, monkeypatch):
+    """Prompts are rendered just ahead of their calls, not all up front."""
+    import docetl.operations.map as map_module
+
+    events = []
+    render = map_module.strict_render
+
+    def strict_render(template, context):
+        events.append("render")
+        return render(template, context)
+
+    def call_llm(model, op_type, messages, *args, **kwargs):
+        events.append("call")
+        return LLMResult(
+            response={"sentiment": "positive"}, total_cost=0.0, validated=True
+        )
+
+    monkeypatch.setattr(map_module, "strict_render", strict_render)
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+    operation = MapOperation(
+        runner,
+        {
+            "name": "many_items_map",
+            "type": "map",
+            "prompt": "Classify {{ input.text }}",
+            "output": {"schema": {"sentiment": "string"}},
+            "bypass_cache": True,
+        },
+        "gpt-4o-mini",
+        4,
+    )
+    results, _ = operation.execute([{"text": str(i)} for i in range(200)])
+
+    assert len(results) == 200
+    assert [r["text"] for r in results] == [str(i) for i in range(200)]
+    # At most one render per worker happens before the first call
+    assert events.index("call") <= 4
+
+
+def test_map_operation_on_cost_counts_reused_calibration_results_once(
+    runner, monkeypatch
+):
+    def call_llm(model, op_type, messages, *args, **kwargs):
+        return LLMResult(
+            response={"sentiment": "positive"}, total_cost=1.0, validated=True
+        )
+
+    reported = []
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+    monkeypatch.setattr(
+        runner.api,
+        "parse_llm_response",
+        lambda *args, **kwargs: [{"calibration_context": ""}],
+    )
+    monkeypatch.setattr(runner.api, "on_cost", reported.append)
+    operation = MapOperation(
+        runner,
+        {
+            "name": "calibrated_cost_map",
+            "type": "map",
+            "prompt": "Classify {{ input.text }}",
+            "output": {"schema": {"sentiment": "string"}},
+            "calibrate": True,
+            "num_calibration_docs": 2,
+            "bypass_cache": True,
+        },
+        "gpt-4o-mini",
+        4,
+    )
+    _, cost = operation.execute([{"text": str(i)} for i in range(5)])
+
+    # The 2 calibration results are reused by the main pass, so only the 5
+    # item calls are reported; the calibration call itself isn't an item call
+    assert cost == 5.0
+    assert sum(reported) == 5.0
@@ -1,7 +1,10 @@
 # ruff: noqa: F811
 
+import time
+
 import pytest
 from docetl.operations.map import ParallelMapOperation
+from docetl.operations.utils import LLMResult
 from dotenv import load_dotenv
 from typing import Dict, Any, List, Tuple
 from tests.conftest import (
@@ -76,3 +79,168 @@ def test_parallel_map_operation_with_empty_input(
 
     assert len(results) == 0
     assert cost == 0
+
+
+def test_parallel_map_operation_reports_cost(runner, monkeypatch):
+    reported = []
+    monkeypatch.setattr(
+        runner.api,
+        "call_llm",
+        lambda *args, **kwargs: LLMResult(
+            response=None, total_cost=0.5, validated=True
+        ),
+    )
+    monkeypatch.setattr(
+        runner.api, "parse_llm_response", lambda *args, **kwargs: [{"a": "x"}]
+    )
+    monkeypatch.setattr(runner.api, "on_cost", reported.append)
+    operation = ParallelMapOperation(
+        runner,
+        {
+            "name": "cost_parallel_map",
+            "type": "parallel_map",
+            "bypass_cache": True,
+            "prompts": [
+                {"prompt": "A {{ input.text }}", "output_keys": ["a"]},
+                {"prompt": "B {{ input.text }}", "output_keys": ["a"]},
+            ],
+            "output": {"schema": {"a": "string"}},
+        },
+        "gpt-4o-mini",
+        4,
+    )
+    _, cost = operation.execute([{"text": "x"}, {"text": "y"}])
+
+    assert cost == 2.0
+    assert reported == [0.5] * 4
+
+
+def test_parallel_map_operation_merges_outputs_in_prompt_order(runner, monkeypatch):
+    def call_llm(model, op_type, messages, *args, **kwargs):
+        # The first prompt finishes last
+        prompt = messages[0]["content"]
+        if prompt.startswith("A"):
+            time.sleep(0.05)
+        return LLMResult(response=prompt, total_cost=0.0, validated=True)
+
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+    monkeypatch.setattr(
+        runner.api,
+        "parse_llm_response",
+        lambda response, *args, **kwargs: [{"a": response}],
+    )
+    operation = ParallelMapOperation(
+        runner,
+        {
+            "name": "ordered_parallel_map",
+            "type": "parallel_map",
+            "enable_observability": True,
+            "prompts": [
+                {"prompt": "A {{ input.text }}", "output_keys": ["a"]},
+                {"prompt": "B {{ input.text }}", "output_keys": ["a"]},
+            ],
+            "output": {"schema": {"a": "string"}},
+        },
+        "gpt-4o-mini",
+        4,
+    )
+    results, _ = operation.execute([{"text": "x"}, {"text": "y"}])
+
+    assert [result["a"] for result in results] == ["B x", "B y"]
+    observability = results[0]["_observability_ordered_parallel_map"]
+    assert list(observability.items()) == [("prompt_0", "A x"), ("prompt_1", "B x")]
+
+
+@pytest.fixture
+def recorded_calls(runner, monkeypatch):
+    """Mock the LLM so each call records its messages and answers with a
+    fresh nested output."""
+    calls = []
+
+    def call_llm(model, op_type, messages, *args, **kwargs):
+        calls.append(messages)
+        return LLMResult(response=None, total_cost=0.0, validated=True)
+
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+    monkeypatch.setattr(
+        runner.api,
+        "parse_llm_response",
+        lambda *args, **kwargs: [{"tags": ["shared"]}],
+    )
+    return calls
+
+
+def _grouping_operation(runner, **config):
+    return ParallelMapOperation(
+        runner,
+        {
+            "name": "grouping_parallel_map",
+            "type": "parallel_map",
+            "prompts": [
+                {"prompt": "Tag {{ input.text }}", "output_keys": ["tags"]},
+            ],
+            "output": {"schema": {"tags": "list[str]"}},
+            **config,
+        },
+        "gpt-4o-mini",
+        4,
+    )
+
+
+def test_parallel_map_operation_shares_calls_with_copies(runner, recorded_calls):
+    operation = _grouping_operation(runner)
+    results, _ = operation.execute([{"text": "x", "id": i} for i in range(3)])
+
+    assert len(recorded_calls) == 1
+    assert [result["tags"] for result in results] == [["shared"]] * 3
+    results[0]["tags"].append("edited")
+    assert results[1]["tags"] == ["shared"]
+    assert results[2]["tags"] == ["shared"]
+
+
+def test_parallel_map_operation_bypass_cache_disables_sharing(runner, recorded_calls):
+    operation = _grouping_operation(runner, bypass_cache=True)
+    operation.execute([{"text": "x"}, {"text": "x"}])
+
+    assert len(recorded_calls) == 2
+
+
+def test_parallel_map_operation_tools_disable_sharing(runner, recorded_calls):
+    tool = {
+        "code": "def tag(text): return text",
+        "function": {
+            "name": "tag",
+            "description": "Tag the text",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    }
+    operation = _grouping_operation(
+        runner,
+        prompts=[
+            {
+                "prompt": "Tag {{ input.text }}",
+                "output_keys": ["tags"],
+                "tools": [tool],
+            }
+        ],
+    )
+    operation.execute([{"text": "x"}, {"text": "x"}])
+
+    assert len(recorded_calls) == 2
+
+
+def test_parallel_map_operation_shares_calls_per_pdf(runner, recorded_calls):
+    operation = _grouping_operation(runner, pdf_url_key="pdf")
+    operation._load_pdf = lambda url: f"data:{url}"
+    operation.execute(
+        [
+            {"text": "x", "pdf": "a.pdf"},
+            {"text": "x", "pdf": "b.pdf"},
+            {"text": "x", "pdf": "a.pdf"},
+        ]
+    )
+
+    pdf_urls = sorted(
+        messages[0]["content"][0]["image_url"]["url"] for messages in recorded_calls
+    )
+    assert pdf_urls == ["data:a.pdf", "data:b.pdf"]
@@ -0,0 +1,165 @@
+# ruff: noqa: F811
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from litellm.utils import ModelResponse
+
+import docetl.operations.utils.api as api
+from docetl.operations.map import ParallelMapOperation
+from docetl.operations.utils import LLMResult
+from tests.conftest import runner
+
+
+def _tool_call_body(arguments):
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 1,
+        "model": "gpt-4o-mini",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": "call-1",
+                            "type": "function",
+                            "function": {
+                                "name": "send_output",
+                                "arguments": json.dumps(arguments),
+                            },
+                        }
+                    ],
+                },
+            }
+        ],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110},
+    }
+
+
+def _answer(body):
+    # Echo each requested output key with the prompt that asked for it
+    keys = body["tools"][0]["function"]["parameters"]["properties"]
+    return {key: body["messages"][-1]["content"] for key in keys}
+
+
+@pytest.fixture
+def batch_api(runner, monkeypatch):
+    """Fake OpenAI batch endpoints; requests whose id is in `fail` error out."""
+    state = {"fail": set(), "submitted": [], "polls": 0, "retried": []}
+
+    def create_file(file, purpose, custom_llm_provider):
+        state["submitted"] = [json.loads(line) for line in file[1].splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def create_batch(**kwargs):
+        return SimpleNamespace(id="batch-1", status="validating")
+
+    def retrieve_batch(batch_id, custom_llm_provider):
+        state["polls"] += 1
+        status = "completed" if state["polls"] > 1 else "in_progress"
+        return SimpleNamespace(
+            id=batch_id, status=status, output_file_id="file-out", errors=None
+        )
+
+    def file_content(file_id, custom_llm_provider):
+        lines = []
+        for request in state["submitted"]:
+            if request["custom_id"] in state["fail"]:
+                response = {"status_code": 500, "body": {}}
+            else:
+                response = {
+                    "status_code": 200,
+                    "body": _tool_call_body(_answer(request["body"])),
+                }
+            lines.append(
+                json.dumps({"custom_id": request["custom_id"], "response": response})
+            )
+        return SimpleNamespace(text="\n".join(lines))
+
+    def call_llm(model, op_type, messages, output_schema, *args, **kwargs):
+        state["retried"].append(messages[-1]["content"])
+        arguments = {key: "retried" for key in output_schema}
+        return LLMResult(
+            response=ModelResponse(**_tool_call_body(arguments)),
+            total_cost=0.0,
+            validated=True,
+        )
+
+    monkeypatch.setattr(api, "create_file", create_file)
+    monkeypatch.setattr(api, "create_batch", create_batch)
+    monkeypatch.setattr(api, "retrieve_batch", retrieve_batch)
+    monkeypatch.setattr(api, "file_content", file_content)
+    monkeypatch.setattr(api.time, "sleep", lambda seconds: None)
+    # Keep the test offline; truncation needs a tokenizer download
+    monkeypatch.setattr(api, "truncate_messages", lambda messages, model: messages)
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+    return state
+
+
+@pytest.fixture
+def batch_parallel_map_config():
+    return {
+        "name": "batch_parallel_map",
+        "type": "parallel_map",
+        "use_batch_api": True,
+        "bypass_cache": True,
+        "prompts": [
+            {"prompt": "Summarize: {{ input.text }}", "output_keys": ["summary"]},
+            {"prompt": "Title: {{ input.text }}", "output_keys": ["title"]},
+        ],
+        "output": {"schema": {"summary": "string", "title": "string"}},
+    }
+
+
+def test_parallel_map_batch_api(batch_api, batch_parallel_map_config, runner):
+    operation = ParallelMapOperation(
+        runner, batch_parallel_map_config, "gpt-4o-mini", 4
+    )
+    results, cost = operation.execute([{"text": "a"}, {"text": "b"}])
+
+    assert results == [
+        {"text": "a", "summary": "Summarize: a", "title": "Title: a"},
+        {"text": "b", "summary": "Summarize: b", "title": "Title: b"},
+    ]
+    assert len(batch_api["submitted"]) == 4
+    assert all(
+        request["body"]["model"] == "gpt-4o-mini"
+        for request in batch_api["submitted"]
+    )
+    assert batch_api["retried"] == []
+    assert cost > 0
+
+
+def test_parallel_map_batch_api_retries_failed_calls(
+    batch_api, batch_parallel_map_config, runner
+):
+    batch_api["fail"] = {"1-1"}
+    operation = ParallelMapOperation(
+        runner, batch_parallel_map_config, "gpt-4o-mini", 4
+    )
+    results, _ = operation.execute([{"text": "a"}, {"text": "b"}])
+
+    assert results == [
+        {"text": "a", "summary": "Summarize: a", "title": "Title: a"},
+        {"text": "b", "summary": "Summarize: b", "title": "retried"},
+    ]
+    assert batch_api["retried"] == ["Title: b"]
+
+
+def test_parallel_map_batch_api_rejects_custom_api_base(
+    batch_api, batch_parallel_map_config, runner, monkeypatch
+):
+    monkeypatch.setattr(runner.api, "default_lm_api_base", "http://localhost:4000")
+    operation = ParallelMapOperation(
+        runner, batch_parallel_map_config, "gpt-4o-mini", 4
+    )
+
+    with pytest.raises(ValueError, match="api_base"):
+        operation.execute([{"text": "a"}])
+    assert batch_api["submitted"] == []
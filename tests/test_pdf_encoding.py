@@ -0,0 +1,93 @@
+import base64
+
+import pytest
+
+import docetl.operations.map as map_module
+from docetl.operations.map import (
+    _data_uri_prefix,
+    _local_pdf_to_data_uri,
+    _pdf_to_data_uri,
+    _PdfLoader,
+)
+
+PDF_PREFIX = "data:application/pdf;base64,"
+
+
+def _pdf_bytes(size):
+    data = b"%PDF-1.7\n" + bytes(range(256)) * (size // 256 + 1)
+    return data[:size]
+
+
+def _chunks(data, chunk_size):
+    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+@pytest.mark.parametrize("size", [5, 6, 7, 16, 17, 100, 1001])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5, 7, 16, 64, 4096])
+def test_pdf_to_data_uri_matches_b64encode(size, chunk_size):
+    data = _pdf_bytes(size)
+    expected = PDF_PREFIX + base64.b64encode(data).decode("ascii")
+
+    assert _pdf_to_data_uri(_chunks(data, chunk_size)) == expected
+
+
+@pytest.mark.parametrize("size_hint", [None, 0, 1, 99, 100, 101, 10_000])
+def test_pdf_to_data_uri_ignores_wrong_size_hints(size_hint):
+    data = _pdf_bytes(100)
+    expected = PDF_PREFIX + base64.b64encode(data).decode("ascii")
+
+    assert _pdf_to_data_uri(_chunks(data, 7), size_hint) == expected
+
+
+def test_pdf_to_data_uri_empty_input():
+    assert _pdf_to_data_uri([]) == PDF_PREFIX
+    assert _pdf_to_data_uri([b""], 10) == PDF_PREFIX
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 16, 17, 100, 1001])
+def test_local_pdf_to_data_uri_matches_b64encode(tmp_path, monkeypatch, size):
+    # A small chunk size, so files span several chunks
+    monkeypatch.setattr(map_module, "_PDF_CHUNK_SIZE", 3 * 5)
+    data = _pdf_bytes(size)
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(data)
+
+    expected = PDF_PREFIX + base64.b64encode(data).decode("ascii")
+    assert _local_pdf_to_data_uri(str(path)) == expected
+
+
+@pytest.mark.parametrize(
+    "head, name, mime_type",
+    [
+        (b"%PDF-1.4\n", "scan.png", "application/pdf"),
+        (b"\x89PNG\r\n\x1a\n\x00\x00", "photo", "image/png"),
+        (b"\xff\xd8\xff\xe0\x00\x10JFIF", "photo.pdf", "image/jpeg"),
+        (b"GIF89a\x01\x00", "", "image/gif"),
+        (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "", "image/webp"),
+        (b"unknown bytes", "photo.png", "image/png"),
+        (b"unknown bytes", "https://example.com/doc.unknownext", "application/pdf"),
+        (b"", "", "application/pdf"),
+    ],
+)
+def test_data_uri_prefix_sniffs_type(head, name, mime_type):
+    assert _data_uri_prefix(head, name) == f"data:{mime_type};base64,".encode()
+
+
+def test_pdf_to_data_uri_sniffs_across_small_chunks():
+    data = b"\x89PNG\r\n\x1a\n" + bytes(20)
+    expected = "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+    assert _pdf_to_data_uri(_chunks(data, 1), name="image") == expected
+
+
+def test_pdf_loader_releases_url_locks(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"{i}.pdf"
+        path.write_bytes(_pdf_bytes(10 + i))
+        paths.append(str(path))
+
+    loader = _PdfLoader(2)
+    for path in paths * 2:
+        assert loader(path) == _local_pdf_to_data_uri(path)
+    assert loader._locks == {}
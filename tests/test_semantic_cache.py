@@ -0,0 +1,158 @@
+# ruff: noqa: F811
+
+import pytest
+
+from docetl.operations.map import MapOperation
+from docetl.operations.utils import LLMResult, SemanticCache
+from tests.conftest import runner
+
+
+def test_semantic_cache_hit_above_threshold():
+    cache = SemanticCache(threshold=0.95)
+    cache.set([1.0, 0.0, 0.0], [{"sentiment": "positive"}])
+
+    assert cache.get([0.99, 0.05, 0.0]) == [{"sentiment": "positive"}]
+
+
+def test_semantic_cache_miss_below_threshold():
+    cache = SemanticCache(threshold=0.95)
+    assert cache.get([1.0, 0.0]) is None
+
+    cache.set([1.0, 0.0], [{"sentiment": "positive"}])
+    assert cache.get([0.0, 1.0]) is None
+
+
+def test_semantic_cache_returns_most_similar_entry():
+    cache = SemanticCache(threshold=0.5)
+    cache.set([1.0, 0.0], "first")
+    cache.set([0.6, 0.8], "second")
+
+    assert cache.get([0.5, 0.85]) == "second"
+    assert cache.get([0.95, 0.1]) == "first"
+
+
+def test_semantic_cache_grows_past_initial_capacity():
+    cache = SemanticCache(threshold=0.99)
+    for i in range(40):
+        vector = [0.0] * 40
+        vector[i] = 1.0
+        cache.set(vector, i)
+
+    for i in range(40):
+        vector = [0.0] * 40
+        vector[i] = 1.0
+        assert cache.get(vector) == i
+
+
+# Embeddings keyed on the text sent for embedding; "good" and "great" are
+# near-duplicates, "bad" is not
+EMBEDDINGS = {"good": [1.0, 0.0], "great": [0.99, 0.05], "bad": [0.0, 1.0]}
+
+
+@pytest.fixture
+def semantic_map(runner, monkeypatch):
+    embedded, prompts = [], []
+
+    def gen_embedding(model, input):
+        embedded.append(input[0])
+        text = input[0].strip()
+        if text not in EMBEDDINGS:
+            raise ValueError("input too long")
+        return {"data": [{"embedding": EMBEDDINGS[text]}]}
+
+    def call_llm(model, op_type, messages, *args, **kwargs):
+        prompts.append(messages[-1]["content"])
+        sentiment = "negative" if "bad" in messages[-1]["content"] else "positive"
+        return LLMResult(
+            response={"sentiment": sentiment, "tags": [sentiment]},
+            total_cost=0.0,
+            validated=True,
+        )
+
+    monkeypatch.setattr(runner.api, "gen_embedding", gen_embedding)
+    monkeypatch.setattr(runner.api, "call_llm", call_llm)
+
+    def make(**config):
+        op = MapOperation(
+            runner,
+            {
+                "name": "semantic_sentiment",
+                "type": "map",
+                "prompt": "Classify the sentiment of this review: {{ input.text }}",
+                "output": {"schema": {"sentiment": "string"}},
+                "semantic_cache": True,
+                **config,
+            },
+            "gpt-4o-mini",
+            1,
+        )
+        return op, embedded, prompts
+
+    return make
+
+
+def test_map_semantic_cache_reuses_near_duplicate_output(semantic_map):
+    op, embedded, prompts = semantic_map()
+    results, _ = op.execute([{"text": "good"}, {"text": "great"}, {"text": "bad"}])
+
+    assert [r["sentiment"] for r in results] == ["positive", "positive", "negative"]
+    assert [r["text"] for r in results] == ["good", "great", "bad"]
+    # Only the template variables are embedded, and "great" hits "good"
+    assert [text.strip() for text in embedded] == ["good", "great", "bad"]
+    assert len(prompts) == 2
+
+
+def test_map_semantic_cache_hit_must_pass_validation(semantic_map):
+    # The output cached for "good" fails validation for "great", so "great"
+    # goes to the LLM
+    op, _, prompts = semantic_map(validate=["output['text'] != 'great'"])
+    results, _ = op.execute([{"text": "good"}, {"text": "great"}])
+
+    assert len(results) == 2
+    assert len(prompts) == 2
+
+
+def test_map_semantic_cache_falls_back_on_embedding_error(semantic_map):
+    op, _, prompts = semantic_map()
+    results, _ = op.execute([{"text": "good"}, {"text": "x" * 100}])
+
+    assert [r["sentiment"] for r in results] == ["positive", "positive"]
+    assert len(prompts) == 2
+
+
+def test_map_semantic_cache_hits_do_not_share_nested_values(semantic_map):
+    op, _, prompts = semantic_map()
+    results, _ = op.execute([{"text": "good"}, {"text": "great"}])
+    results[0]["tags"].append("leak")
+
+    assert results[1]["tags"] == ["positive"]
+    later, _ = op.execute([{"text": "great"}])
+    assert later[0]["tags"] == ["positive"]
+    assert len(prompts) == 1
+
+
+def test_map_semantic_cache_skips_items_answered_by_batch_prompt(
+    semantic_map, runner, monkeypatch
+):
+    monkeypatch.setattr(
+        runner.api,
+        "call_llm_batch",
+        lambda *args, **kwargs: LLMResult(
+            response=None, total_cost=0.0, validated=True
+        ),
+    )
+    monkeypatch.setattr(
+        runner.api,
+        "parse_llm_response",
+        lambda *args, **kwargs: [
+            {"results": [{"sentiment": "positive"}, {"sentiment": "negative"}]}
+        ],
+    )
+    op, embedded, _ = semantic_map(
+        batch_prompt="Classify: {% for input in inputs %}{{ input.text }}{% endfor %}",
+        max_batch_size=2,
+    )
+    results, _ = op.execute([{"text": "good"}, {"text": "bad"}])
+
+    assert len(results) == 2
+    assert embedded == []